@@ -38,7 +38,7 @@ def serve(host: str, port: int, debug: bool):
         finally:
             await framework.stop_server()
     
-    logger.info(f"启动MCP服务器在 {host}:{port}")
+    logger.info("启动MCP服务器在 {}:{}", host, port)
     asyncio.run(start_server())
 
 
@@ -99,7 +99,7 @@ def health():
     """检查系统健康状态"""
     async def run_health():
         async with MCPFramework() as framework:
-            health_status = await framework.health_check()
+            health_status = await framework.deep_health_check()
             
             click.echo("系统健康状态:")
             click.echo(f"框架状态: {health_status['framework']}")
@@ -3,6 +3,7 @@ MCP LangGraph Framework - Core framework built on LangChain and LangGraph.
 """
 
 import asyncio
+import uuid
 from typing import Dict, Any, Optional, List, Type
 from loguru import logger
 
@@ -16,6 +17,7 @@ from langgraph.checkpoint.memory import MemorySaver
 from ..config.settings import Settings, get_settings
 from ..tools.base import MCPTool
 from ..langchain.graph_builder import GraphBuilder
+from .vector_store import SimpleVectorStore
 
 
 class MCPLangGraphFramework:
@@ -29,10 +31,24 @@ class MCPLangGraphFramework:
     - Multi-model support
     """
     
-    def __init__(self, settings: Optional[Settings] = None):
-        """Initialize the MCP LangGraph Framework."""
+    def __init__(
+        self,
+        settings: Optional[Settings] = None,
+        llm: Optional[BaseLLM] = None,
+        embeddings: Optional[Embeddings] = None,
+        vectorstore: Optional[VectorStore] = None
+    ):
+        """
+        Initialize the MCP LangGraph Framework.
+        
+        ``llm``, ``embeddings`` and ``vectorstore`` replace the components
+        that would otherwise be built from settings during initialization.
+        """
         self.settings = settings or get_settings()
         self._initialized = False
+        self._llm_override = llm
+        self._embeddings_override = embeddings
+        self._vectorstore_override = vectorstore
         
         # Core components
         self.llm: Optional[BaseLLM] = None
@@ -42,6 +58,9 @@ class MCPLangGraphFramework:
         self.graph: Optional[StateGraph] = None
         self.graph_builder: Optional[GraphBuilder] = None
         self.memory = MemorySaver()
+        self._graph_stale = False
+        self._app = None
+        self._init_lock: Optional[asyncio.Lock] = None
         
         logger.info("MCP LangGraph Framework initialized")
     
@@ -54,37 +73,77 @@ class MCPLangGraphFramework:
         try:
             logger.info("Initializing MCP LangGraph Framework components...")
             
-            # Initialize LLM
-            await self._initialize_llm()
-            
-            # Initialize embeddings
-            await self._initialize_embeddings()
-            
-            # Initialize vector store
-            await self._initialize_vectorstore()
-            
-            # Initialize graph builder
-            self.graph_builder = GraphBuilder(
-                llm=self.llm,
-                tools=list(self.tools.values()),
-                memory=self.memory
-            )
-            
-            # Build default graph
-            self.graph = self.graph_builder.build_default_graph()
+            # Components already created lazily are reused
+            await self.get_llm()
+            await self.get_embeddings()
+            await self.get_vectorstore()
+            await self.get_graph()
             
             self._initialized = True
             logger.success("MCP LangGraph Framework fully initialized")
             
         except Exception as e:
-            logger.error(f"Failed to initialize framework: {e}")
+            logger.error("Failed to initialize framework: {}", e)
             await self.cleanup()
             raise
     
+    def _component_lock(self) -> asyncio.Lock:
+        """Lock guarding lazy component creation, created on first use."""
+        if self._init_lock is None:
+            self._init_lock = asyncio.Lock()
+        return self._init_lock
+    
+    async def get_llm(self) -> BaseLLM:
+        """Get the language model, initializing it on first use."""
+        if self.llm is None:
+            async with self._component_lock():
+                if self.llm is None:
+                    await self._initialize_llm()
+        return self.llm
+    
+    async def get_embeddings(self) -> Embeddings:
+        """Get the embeddings model, initializing it on first use."""
+        if self.embeddings is None:
+            async with self._component_lock():
+                if self.embeddings is None:
+                    await self._initialize_embeddings()
+        return self.embeddings
+    
+    async def get_vectorstore(self) -> VectorStore:
+        """Get the vector store, initializing it (and embeddings) on first use."""
+        if self.vectorstore is None:
+            await self.get_embeddings()
+            async with self._component_lock():
+                if self.vectorstore is None:
+                    await self._initialize_vectorstore()
+        return self.vectorstore
+    
+    async def get_graph(self) -> StateGraph:
+        """Get the workflow graph, initializing it (and the LLM) on first use."""
+        if self.graph is None:
+            await self.get_llm()
+            async with self._component_lock():
+                if self.graph is None:
+                    self._build_graph()
+        return self.graph
+    
+    def _build_graph(self) -> None:
+        """Build the workflow graph from the currently registered tools."""
+        self.graph_builder = GraphBuilder(
+            llm=self.llm,
+            tools=list(self.tools.values()),
+            memory=self.memory
+        )
+        self.graph = self.graph_builder.build_default_graph()
+        self._graph_stale = False
+        self._app = None
+    
     async def _initialize_llm(self) -> None:
         """Initialize the language model."""
+        if self._llm_override is not None:
+            self.llm = self._llm_override
         # Use OpenAI-compatible API for DeepSeek/Qwen
-        if self.settings.deepseek_api_key:
+        elif self.settings.deepseek_api_key:
             from langchain_openai import ChatOpenAI
             self.llm = ChatOpenAI(
                 api_key=self.settings.deepseek_api_key,
@@ -131,14 +190,20 @@ class MCPLangGraphFramework:
                     **kwargs: Any,
                 ) -> str:
                     return self.responses[0]
+                
+                def bind_tools(self, tools, **kwargs):
+                    # Placeholder replies are fixed text and never request tools
+                    return self
             
             self.llm = SimpleFakeLLM()
         
-        logger.info(f"LLM initialized: {type(self.llm).__name__}")
+        logger.info("LLM initialized: {}", type(self.llm).__name__)
     
     async def _initialize_embeddings(self) -> None:
         """Initialize embeddings model."""
-        if self.settings.qwen_api_key:
+        if self._embeddings_override is not None:
+            self.embeddings = self._embeddings_override
+        elif self.settings.qwen_api_key:
             from langchain_openai import OpenAIEmbeddings
             self.embeddings = OpenAIEmbeddings(
                 api_key=self.settings.qwen_api_key,
@@ -149,77 +214,34 @@ class MCPLangGraphFramework:
             logger.warning("No embedding API key provided, using simple fake embeddings")
             # Create a simple fake embeddings class to avoid compatibility issues
             class SimpleFakeEmbeddings:
-                def __init__(self, size=1536):
-                    self.size = size
-                
-                async def aembed_documents(self, texts):
-                    import random
-                    return [[random.random() for _ in range(self.size)] for _ in texts]
-                
-                async def aembed_query(self, text):
-                    import random
-                    return [random.random() for _ in range(self.size)]
+                def __init__(self, dimensions=1536):
+                    self.dimensions = dimensions
                 
                 def embed_documents(self, texts):
-                    import random
-                    return [[random.random() for _ in range(self.size)] for _ in texts]
-                
+                    return [self.embed_query(text) for text in texts]
+
                 def embed_query(self, text):
                     import random
-                    return [random.random() for _ in range(self.size)]
+                    return [random.random() for _ in range(self.dimensions)]
+
+                async def aembed_documents(self, texts):
+                    return self.embed_documents(texts)
+
+                async def aembed_query(self, text):
+                    return self.embed_query(text)
             
-            self.embeddings = SimpleFakeEmbeddings(size=1536)
+            self.embeddings = SimpleFakeEmbeddings(dimensions=self.settings.embedding_dimension)
         
-        logger.info(f"Embeddings initialized: {type(self.embeddings).__name__}")
+        logger.info("Embeddings initialized: {}", type(self.embeddings).__name__)
     
     async def _initialize_vectorstore(self) -> None:
         """Initialize vector store."""
-        # Create a simple in-memory vector store to avoid FAISS dependency
-        class SimpleVectorStore:
-            def __init__(self, embeddings):
-                self.embeddings = embeddings
-                self.documents = []
-                self.vectors = []
-            
-            async def aadd_texts(self, texts, metadatas=None):
-                """Add texts to the vector store."""
-                embeddings = await self.embeddings.aembed_documents(texts)
-                for i, text in enumerate(texts):
-                    self.documents.append({
-                        "text": text,
-                        "metadata": metadatas[i] if metadatas else {},
-                        "embedding": embeddings[i]
-                    })
-                return [f"doc_{len(self.documents) - len(texts) + i}" for i in range(len(texts))]
-            
-            async def asimilarity_search(self, query, k=3):
-                """Search for similar documents."""
-                if not self.documents:
-                    return []
-                
-                query_embedding = await self.embeddings.aembed_query(query)
-                
-                # Simple cosine similarity
-                similarities = []
-                for doc in self.documents:
-                    # Calculate cosine similarity
-                    dot_product = sum(a * b for a, b in zip(query_embedding, doc["embedding"]))
-                    norm_a = sum(a * a for a in query_embedding) ** 0.5
-                    norm_b = sum(b * b for b in doc["embedding"]) ** 0.5
-                    similarity = dot_product / (norm_a * norm_b) if norm_a * norm_b > 0 else 0
-                    similarities.append((similarity, doc))
-                
-                # Sort by similarity and return top k
-                similarities.sort(key=lambda x: x[0], reverse=True)
-                
-                # Create document objects
-                class SimpleDocument:
-                    def __init__(self, page_content, metadata=None):
-                        self.page_content = page_content
-                        self.metadata = metadata or {}
-                
-                return [SimpleDocument(doc["text"], doc["metadata"]) for _, doc in similarities[:k]]
+        if self._vectorstore_override is not None:
+            self.vectorstore = self._vectorstore_override
+            logger.info("Vector store initialized: {}", type(self.vectorstore).__name__)
+            return
         
+        # Use a simple in-memory vector store to avoid FAISS dependency
         self.vectorstore = SimpleVectorStore(self.embeddings)
         
         # Add some initial documents
@@ -238,55 +260,114 @@ class MCPLangGraphFramework:
         self.tools.clear()
         self.graph = None
         self.graph_builder = None
+        self._graph_stale = False
+        self._app = None
+        self._init_lock = None
         
         self._initialized = False
         logger.info("MCP LangGraph Framework cleanup completed")
     
     def register_tool(self, tool: BaseTool) -> None:
-        """Register a tool."""
+        """Register a tool, replacing any tool already registered under its name."""
+        if tool.name in self.tools:
+            logger.warning("Tool {} is already registered, replacing it", tool.name)
         self.tools[tool.name] = tool
-        logger.info(f"Registered tool: {tool.name}")
+        logger.info("Registered tool: {}", tool.name)
         
-        # Rebuild graph if already initialized
+        # Rebuild graph lazily on the next run
         if self.graph_builder:
-            self.graph = self.graph_builder.build_default_graph()
+            self._graph_stale = True
     
     def unregister_tool(self, tool_name: str) -> None:
         """Unregister a tool."""
         if tool_name in self.tools:
             del self.tools[tool_name]
-            logger.info(f"Unregistered tool: {tool_name}")
+            logger.info("Unregistered tool: {}", tool_name)
             
-            # Rebuild graph if already initialized
+            # Rebuild graph lazily on the next run
             if self.graph_builder:
-                self.graph = self.graph_builder.build_default_graph()
+                self._graph_stale = True
     
-    async def run_workflow(
-        self,
-        input_data: Dict[str, Any],
-        config: Optional[Dict[str, Any]] = None
-    ) -> Dict[str, Any]:
-        """Run a workflow using the LangGraph."""
+    async def _get_app(self):
+        """Get the compiled workflow, rebuilding the graph if tools changed."""
         if not self._initialized:
             await self.initialize()
         
+        if self._graph_stale:
+            self._build_graph()
+        
         if not self.graph:
             raise RuntimeError("Graph not initialized")
         
-        # Compile the graph with memory
-        app = self.graph.compile(checkpointer=self.memory)
+        # Compile the graph with memory once per graph build
+        if self._app is None:
+            self._app = self.graph.compile(checkpointer=self.memory)
+        return self._app
+    
+    @staticmethod
+    def _with_thread_id(config: Optional[Dict[str, Any]], thread_id: str) -> Dict[str, Any]:
+        """Copy of ``config`` with the checkpointer's thread_id filled in if missing."""
+        run_config = dict(config or {})
+        run_config["configurable"] = dict(run_config.get("configurable") or {})
+        run_config["configurable"].setdefault("thread_id", thread_id)
+        return run_config
+    
+    async def run_workflow(
+        self,
+        input_data: Dict[str, Any],
+        config: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Run a workflow using the LangGraph."""
+        app = await self._get_app()
         
         # Prepare config with required thread_id
-        run_config = config or {}
-        if "configurable" not in run_config:
-            run_config["configurable"] = {}
-        if "thread_id" not in run_config["configurable"]:
-            run_config["configurable"]["thread_id"] = "default_thread"
+        run_config = self._with_thread_id(config, "default_thread")
         
         # Run the workflow
         result = await app.ainvoke(input_data, config=run_config)
         return result
     
+    async def run_workflow_batch(
+        self,
+        inputs: List[Dict[str, Any]],
+        configs: Optional[List[Dict[str, Any]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Run several independent workflows in one batched graph call.
+        
+        Each input runs on its own conversation thread unless its config
+        names one; results are returned in input order. Generated threads
+        are removed from the checkpointer afterwards, so pass a thread_id
+        to keep an input's conversation.
+        """
+        if configs is not None and len(configs) != len(inputs):
+            raise ValueError(
+                f"Got {len(configs)} configs for {len(inputs)} workflow inputs"
+            )
+        if not inputs:
+            return []
+        
+        app = await self._get_app()
+        
+        configs = configs or [None] * len(inputs)
+        batch_id = uuid.uuid4().hex
+        run_configs = [
+            self._with_thread_id(config, f"batch_{batch_id}_{i}")
+            for i, config in enumerate(configs)
+        ]
+        generated = [
+            run_config["configurable"]["thread_id"]
+            for config, run_config in zip(configs, run_configs)
+            if not (config or {}).get("configurable", {}).get("thread_id")
+        ]
+        
+        try:
+            return await app.abatch(inputs, config=run_configs)
+        finally:
+            # Throwaway threads would otherwise accumulate in memory
+            for thread_id in generated:
+                await self.memory.adelete_thread(thread_id)
+    
     async def chat(self, message: str, **kwargs) -> str:
         """Simple chat interface."""
         from langchain_core.messages import HumanMessage
@@ -311,8 +392,8 @@ class MCPLangGraphFramework:
         """Get list of available tools."""
         return list(self.tools.keys())
     
-    async def health_check(self) -> Dict[str, Any]:
-        """Perform health check."""
+    def status(self) -> Dict[str, Any]:
+        """Report which components are initialized, without any I/O."""
         return {
             "framework": "healthy" if self._initialized else "not_initialized",
             "components": {
@@ -324,6 +405,33 @@ class MCPLangGraphFramework:
             "tools_count": len(self.tools)
         }
     
+    async def health_check(self) -> Dict[str, Any]:
+        """Perform health check (cheap: same as ``status``, no I/O)."""
+        return self.status()
+    
+    async def deep_health_check(self) -> Dict[str, Any]:
+        """Perform health check that round-trips each initialized component."""
+        health = self.status()
+        
+        probes = {}
+        if self.llm:
+            probes["llm"] = self.llm.ainvoke("ping")
+        if self.embeddings:
+            probes["embeddings"] = self.embeddings.aembed_query("health check")
+        if self.vectorstore:
+            probes["vectorstore"] = self.vectorstore.asimilarity_search("health check", k=1)
+        
+        results = await asyncio.gather(*probes.values(), return_exceptions=True)
+        for name, result in zip(probes, results):
+            if isinstance(result, Exception):
+                logger.error("Health check failed for {}: {}", name, result)
+                health["components"][name] = f"error: {result}"
+                health["framework"] = "unhealthy"
+            else:
+                health["components"][name] = "healthy"
+        
+        return health
+    
     async def __aenter__(self):
         """Async context manager entry."""
         await self.initialize()
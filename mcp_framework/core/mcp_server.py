@@ -54,7 +54,9 @@ class MCPServer:
             logger.warning("MCP server already running")
             return
         
-        logger.info(f"Starting MCP server on {self.settings.api_host}:{self.settings.api_port}")
+        logger.info(
+            "Starting MCP server on {}:{}", self.settings.api_host, self.settings.api_port
+        )
         
         # This is a placeholder for actual server implementation
         # In a real implementation, you would start the MCP protocol server here
@@ -0,0 +1,359 @@
+"""
+Simple in-memory vector store used when no external vector database is configured.
+"""
+
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Rows scored per step; bounds float16 upcast temporaries and keeps each
+# tile cache-resident while it is multiplied against a batch of queries
+_SCORE_BLOCK_ROWS = 4096
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale vectors (or matrix rows) to unit length in place; zero vectors are left as-is."""
+    norms = np.sqrt(np.einsum("...i,...i->...", vectors, vectors))[..., None]
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+
+class SimpleDocument:
+    """Minimal document returned by SimpleVectorStore searches."""
+
+    __slots__ = ("page_content", "metadata")
+
+    def __init__(self, page_content: str, metadata: Optional[Dict[str, Any]] = None):
+        self.page_content = page_content
+        self.metadata = metadata or {}
+
+
+class SimpleVectorStore:
+    """
+    In-memory vector store.
+
+    Embeddings are normalized on insert and kept in a single contiguous
+    float32 matrix (one row per document) with ids, texts and metadata in
+    parallel lists, so a cosine search is one matrix-vector product instead
+    of a Python loop over documents. Deletes move the last row into the
+    freed slot to keep the matrix dense. Passing ``dtype=np.float16`` halves
+    the matrix footprint; rows are upcast to float32 block by block when
+    scoring.
+    Query embeddings are kept in a small LRU cache so repeated queries skip
+    the embedding model, and large ingests are embedded in concurrent
+    batches of ``embedding_batch_size`` texts, with duplicate texts in one
+    ingest embedded only once.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        initial_capacity: int = 64,
+        query_cache_size: int = 1024,
+        embedding_batch_size: int = 256,
+        dtype=np.float32
+    ):
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in (np.float32, np.float16):
+            raise ValueError(f"Unsupported vector dtype: {self.dtype}")
+
+        self._query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._query_cache_size = query_cache_size
+        self.embeddings = embeddings
+        self.embedding_batch_size = embedding_batch_size
+        self._initial_capacity = initial_capacity
+        self._next_id = 0
+        self._ids: List[str] = []
+        self._id_to_row: Dict[str, int] = {}
+        self._texts: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def embeddings(self):
+        """Embeddings model; assigning a new one clears the query cache."""
+        return self._embeddings
+
+    @embeddings.setter
+    def embeddings(self, embeddings) -> None:
+        # Cached query vectors belong to the previous model
+        self._embeddings = embeddings
+        self._query_cache.clear()
+
+    def _reserve(self, size: int, dimension: int) -> None:
+        """Make sure the matrix has room for ``size`` rows, doubling when full."""
+        if self._matrix is None:
+            capacity = max(size, self._initial_capacity)
+        elif size > self._matrix.shape[0]:
+            capacity = max(size, 2 * self._matrix.shape[0])
+        else:
+            return
+
+        matrix = np.zeros((capacity, dimension), dtype=self.dtype)
+        if self._matrix is not None:
+            matrix[:self._size] = self._matrix[:self._size]
+        self._matrix = matrix
+
+    def _cached_query(self, query: str) -> Optional[np.ndarray]:
+        """Return a cached query embedding, marking it recently used."""
+        vector = self._query_cache.get(query)
+        if vector is not None:
+            self._query_cache.move_to_end(query)
+        return vector
+
+    def _cache_query(self, query: str, embedding: List[float]) -> np.ndarray:
+        """Normalize a fresh query embedding and add it to the LRU cache."""
+        vector = _normalize(np.array(embedding, dtype=np.float32))
+        vector.flags.writeable = False
+        if self._query_cache_size > 0:
+            self._query_cache[query] = vector
+            if len(self._query_cache) > self._query_cache_size:
+                self._query_cache.popitem(last=False)
+        return vector
+
+    def _embed_query(self, query: str) -> np.ndarray:
+        """Return the normalized query embedding, reusing cached ones."""
+        vector = self._cached_query(query)
+        if vector is None:
+            vector = self._cache_query(query, self.embeddings.embed_query(query))
+        return vector
+
+    async def _aembed_query(self, query: str) -> np.ndarray:
+        """Async version of ``_embed_query``."""
+        vector = self._cached_query(query)
+        if vector is None:
+            vector = self._cache_query(query, await self.embeddings.aembed_query(query))
+        return vector
+
+    def _batches(self, texts: List[str]) -> List[List[str]]:
+        """Split texts into embedding requests of at most ``embedding_batch_size``."""
+        size = self.embedding_batch_size
+        return [texts[i:i + size] for i in range(0, len(texts), size)]
+
+    @staticmethod
+    def _dedupe(texts: List[str]):
+        """Unique texts in first-seen order, plus each input's index into them."""
+        positions: Dict[str, int] = {}
+        inverse = np.fromiter(
+            (positions.setdefault(text, len(positions)) for text in texts),
+            dtype=np.intp, count=len(texts)
+        )
+        return list(positions), inverse
+
+    def _embed_documents(self, texts: List[str]) -> np.ndarray:
+        """Embed texts, issuing one request per batch of unique texts."""
+        unique, inverse = self._dedupe(texts)
+        embeddings = [
+            vector
+            for batch in self._batches(unique)
+            for vector in self.embeddings.embed_documents(batch)
+        ]
+        return _normalize(np.array(embeddings, dtype=np.float32))[inverse]
+
+    async def _aembed_documents(self, texts: List[str]) -> np.ndarray:
+        """Embed texts like ``_embed_documents``, running the batch requests concurrently."""
+        unique, inverse = self._dedupe(texts)
+        batches = await asyncio.gather(*(
+            self.embeddings.aembed_documents(batch) for batch in self._batches(unique)
+        ))
+        embeddings = [vector for batch in batches for vector in batch]
+        return _normalize(np.array(embeddings, dtype=np.float32))[inverse]
+
+    def _check_dimension(self, width: int, what: str) -> None:
+        """Reject vectors whose width differs from the vectors already stored."""
+        if self._matrix is not None and width != self._matrix.shape[1]:
+            raise ValueError(
+                f"{what} has dimension {width}, but the store holds "
+                f"{self._matrix.shape[1]}-dimensional vectors"
+            )
+
+    def _score(self, queries: np.ndarray) -> np.ndarray:
+        """Cosine scores of every stored row against a normalized query (D,) or queries (D, Q)."""
+        rows = self._matrix[:self._size]
+        if rows.dtype == np.float32 and queries.ndim == 1:
+            return rows @ queries
+
+        scores = np.empty((self._size,) + queries.shape[1:], dtype=np.float32)
+        for start in range(0, self._size, _SCORE_BLOCK_ROWS):
+            block = rows[start:start + _SCORE_BLOCK_ROWS]
+            scores[start:start + len(block)] = block.astype(np.float32, copy=False) @ queries
+        return scores
+
+    def _candidate_rows(self, filter) -> Optional[np.ndarray]:
+        """Indices of rows whose metadata passes ``filter``, or None for all rows."""
+        if filter is None:
+            return None
+        if callable(filter):
+            matches = filter
+        else:
+            items = tuple(filter.items())
+            matches = lambda metadata: all(metadata.get(key) == value for key, value in items)
+        mask = np.fromiter(
+            (matches(metadata) for metadata in self._metadatas), dtype=bool, count=self._size
+        )
+        return np.flatnonzero(mask)
+
+    def _top_k(
+        self,
+        scores: np.ndarray,
+        k: int,
+        rows: Optional[np.ndarray] = None
+    ) -> List[SimpleDocument]:
+        """Documents for the k highest scores, best first; ``rows`` maps scores to rows."""
+        # Select the top k in O(n), then order just those (ties by row order)
+        if k < len(scores):
+            top = np.argpartition(-scores, k)[:k]
+            top = top[np.lexsort((top, -scores[top]))]
+        else:
+            top = np.argsort(-scores, kind="stable")
+        if rows is not None:
+            top = rows[top]
+        return [SimpleDocument(self._texts[i], self._metadatas[i]) for i in top]
+
+    def _search(
+        self,
+        query_vector: np.ndarray,
+        k: int,
+        rows: Optional[np.ndarray]
+    ) -> List[SimpleDocument]:
+        """Rank candidate rows against a normalized query."""
+        self._check_dimension(query_vector.shape[0], "Query embedding")
+        # Rows are unit length, so cosine similarity is a single BLAS matvec
+        scores = self._score(query_vector)
+        if rows is not None:
+            scores = scores[rows]
+        return self._top_k(scores, k, rows)
+
+    def _search_batch(self, query_vectors: List[np.ndarray], k: int) -> List[List[SimpleDocument]]:
+        """Rank all rows against several normalized queries."""
+        if not query_vectors:
+            return []
+        for query_vector in query_vectors:
+            self._check_dimension(query_vector.shape[0], "Query embedding")
+        # One GEMM per tile of rows, shared by all queries
+        scores = self._score(np.stack(query_vectors, axis=1))
+        return [self._top_k(scores[:, i], k) for i in range(scores.shape[1])]
+
+    def _add_vectors(self, texts, vectors: np.ndarray, metadatas) -> List[str]:
+        """Append normalized vectors and their documents, returning the new ids."""
+        self._check_dimension(vectors.shape[1], "Document embedding")
+        start = self._size
+        end = start + len(texts)
+        self._reserve(end, vectors.shape[1])
+        self._matrix[start:end] = vectors
+
+        ids = [f"doc_{self._next_id + i}" for i in range(len(texts))]
+        self._next_id += len(texts)
+        self._id_to_row.update(zip(ids, range(start, end)))
+        self._ids.extend(ids)
+        self._texts.extend(texts)
+        if metadatas:
+            self._metadatas.extend(metadata or {} for metadata in metadatas)
+        else:
+            self._metadatas.extend({} for _ in texts)
+        self._size = end
+
+        return ids
+
+    @staticmethod
+    def _check_metadatas(texts, metadatas) -> None:
+        """Reject metadata lists that do not line up one-to-one with texts."""
+        if metadatas and len(metadatas) != len(texts):
+            raise ValueError(
+                f"Got {len(metadatas)} metadatas for {len(texts)} texts"
+            )
+
+    def add_texts(self, texts, metadatas=None):
+        """Add texts to the vector store."""
+        if not texts:
+            return []
+        self._check_metadatas(texts, metadatas)
+        return self._add_vectors(texts, self._embed_documents(texts), metadatas)
+
+    async def aadd_texts(self, texts, metadatas=None):
+        """Add texts to the vector store."""
+        if not texts:
+            return []
+        self._check_metadatas(texts, metadatas)
+        return self._add_vectors(texts, await self._aembed_documents(texts), metadatas)
+
+    def delete(self, ids=None, **kwargs):
+        """Delete documents by id."""
+        if not ids:
+            return False
+
+        for doc_id in ids:
+            row = self._id_to_row.pop(doc_id, None)
+            if row is None:
+                continue
+
+            # Swap the last row into the hole so rows stay contiguous
+            last = self._size - 1
+            if row != last:
+                moved_id = self._ids[last]
+                self._matrix[row] = self._matrix[last]
+                self._ids[row] = moved_id
+                self._texts[row] = self._texts[last]
+                self._metadatas[row] = self._metadatas[last]
+                self._id_to_row[moved_id] = row
+
+            self._ids.pop()
+            self._texts.pop()
+            self._metadatas.pop()
+            self._size = last
+
+        return True
+
+    async def adelete(self, ids=None, **kwargs):
+        """Delete documents by id."""
+        return self.delete(ids, **kwargs)
+
+    def similarity_search(self, query, k=3, filter=None):
+        """
+        Search for similar documents.
+
+        ``filter`` is either a dict of metadata values that must all match, or a
+        callable taking a document's metadata and returning a bool.
+        """
+        if not self._size:
+            return []
+        rows = self._candidate_rows(filter)
+        if rows is not None and not rows.size:
+            return []
+        return self._search(self._embed_query(query), k, rows)
+
+    async def asimilarity_search(self, query, k=3, filter=None):
+        """Search for similar documents (see ``similarity_search``)."""
+        if not self._size:
+            return []
+
+        query_vector = await self._aembed_query(query)
+
+        # Build the mask only now: deletes during the await may swap rows
+        if not self._size:
+            return []
+        rows = self._candidate_rows(filter)
+        if rows is not None and not rows.size:
+            return []
+        return self._search(query_vector, k, rows)
+
+    def similarity_search_batch(self, queries, k=3):
+        """Search for similar documents for several queries at once."""
+        if not self._size:
+            return [[] for _ in queries]
+        return self._search_batch([self._embed_query(q) for q in queries], k)
+
+    async def asimilarity_search_batch(self, queries, k=3):
+        """Search for similar documents for several queries at once."""
+        if not self._size:
+            return [[] for _ in queries]
+        query_vectors = await asyncio.gather(*(self._aembed_query(q) for q in queries))
+        if not self._size:
+            return [[] for _ in queries]
+        return self._search_batch(list(query_vectors), k)
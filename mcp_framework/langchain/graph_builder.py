@@ -32,14 +32,28 @@ class GraphBuilder:
     ):
         self.llm = llm
         self.tools = tools
+        self.tools_by_name = {tool.name: tool for tool in tools}
         self.memory = memory
         
         # Bind tools to LLM if available
         if self.tools:
-            self.llm_with_tools = self.llm.bind_tools(self.tools)
+            self.llm_with_tools = self._bind_tools()
         else:
             self.llm_with_tools = self.llm
     
+    def _bind_tools(self):
+        """Bind tools to the LLM, failing loudly if it cannot call tools."""
+        error = RuntimeError(
+            f"LLM {type(self.llm).__name__} does not support tool calling; "
+            f"cannot use tools: {', '.join(self.tools_by_name)}"
+        )
+        if not hasattr(self.llm, "bind_tools"):
+            raise error
+        try:
+            return self.llm.bind_tools(self.tools)
+        except NotImplementedError as e:
+            raise error from e
+    
     def build_default_graph(self) -> StateGraph:
         """Build a default agent workflow graph."""
         
@@ -134,15 +148,14 @@ class GraphBuilder:
                 tool_args = tool_call.get("args", {})
                 
                 # Find and execute the tool
-                for tool in self.tools:
-                    if tool.name == tool_name:
-                        try:
-                            # Use sync run for compatibility
-                            result = tool.run(**tool_args)
-                            tool_results.append(f"Tool {tool_name} result: {result}")
-                        except Exception as e:
-                            tool_results.append(f"Tool {tool_name} error: {str(e)}")
-                        break
+                tool = self.tools_by_name.get(tool_name)
+                if tool is not None:
+                    try:
+                        # Use sync run for compatibility
+                        result = tool.run(**tool_args)
+                        tool_results.append(f"Tool {tool_name} result: {result}")
+                    except Exception as e:
+                        tool_results.append(f"Tool {tool_name} error: {str(e)}")
             
             # Create a response message with tool results
             from langchain_core.messages import AIMessage
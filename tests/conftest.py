@@ -0,0 +1,149 @@
+"""
+Shared fixtures for MCP LangGraph Framework tests.
+"""
+
+import hashlib
+import os
+import sys
+
+import pytest
+import pytest_asyncio
+from mcp_framework import MCPLangGraphFramework
+
+from fakes import CachedEmbeddings, FakeEmbeddings, fake_llm
+
+
+# Run async tests on uvloop when available (it does not support Windows)
+if sys.platform != "win32":
+    try:
+        import uvloop
+    except ImportError:
+        uvloop = None
+
+    if uvloop is not None:
+        # Best effort: the hook exists from pytest-asyncio 1.4, older
+        # releases ignore it and keep the default loop
+        @pytest.hookimpl(optionalhook=True)
+        def pytest_asyncio_loop_factories(config, item):
+            return {"uvloop": uvloop.new_event_loop}
+
+
+# pytest cache entry holding chat responses from remote models
+_LLM_CACHE_KEY = "mcp_framework/llm_cache"
+
+# Conversation thread that framework.chat() runs on
+_CHAT_THREAD_ID = "default_thread"
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--integration",
+        action="store_true",
+        default=False,
+        help="Run against the configured models instead of in-process fakes."
+    )
+    parser.addoption(
+        "--llm-cache",
+        action="store_true",
+        default=False,
+        help="With --integration, replay chat responses recorded by earlier sessions."
+    )
+
+
+def _test_mode(config) -> bool:
+    """Whether tests use in-process fakes (MCP_TEST_MODE, default on) rather than real clients."""
+    if config.getoption("--integration"):
+        return False
+    return os.getenv("MCP_TEST_MODE", "1") != "0"
+
+
+def _new_framework(config) -> MCPLangGraphFramework:
+    """Uninitialized framework, wired to the in-process fakes in test mode."""
+    if _test_mode(config):
+        return MCPLangGraphFramework(llm=fake_llm(), embeddings=FakeEmbeddings())
+    return MCPLangGraphFramework()
+
+
+def _thread_history(framework, thread_id: str) -> str:
+    """Messages checkpointed so far on ``thread_id``, flattened for hashing."""
+    checkpoint = framework.memory.get_tuple({"configurable": {"thread_id": thread_id}})
+    if checkpoint is None:
+        return ""
+    messages = checkpoint.checkpoint.get("channel_values", {}).get("messages", [])
+    return "\x1e".join(
+        f"{type(message).__name__}:{getattr(message, 'content', message)}"
+        for message in messages
+    )
+
+
+def _install_chat_cache(framework, responses: dict) -> None:
+    """
+    Serve repeated chat prompts from ``responses``.
+
+    Keys are SHA-256 of model, thread id, the thread's history and the
+    prompt, so a reply is only reused for the same conversation state.
+    """
+    model = getattr(framework.llm, "model_name", None) or type(framework.llm).__name__
+    chat = framework.chat
+
+    async def cached_chat(message: str, **kwargs) -> str:
+        history = _thread_history(framework, _CHAT_THREAD_ID)
+        key = hashlib.sha256(
+            f"{model}\0{_CHAT_THREAD_ID}\0{history}\0{message}".encode()
+        ).hexdigest()
+        if key not in responses:
+            responses[key] = await chat(message, **kwargs)
+        return responses[key]
+
+    framework.chat = cached_chat
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def shared_framework(pytestconfig):
+    """Initialize one framework for the whole test session."""
+    test_mode = _test_mode(pytestconfig)
+
+    async with _new_framework(pytestconfig) as framework:
+        # Repeated texts across tests are embedded only once
+        framework.embeddings = CachedEmbeddings(framework.embeddings)
+        framework.vectorstore.embeddings = framework.embeddings
+
+        # Pay one-off setup (client connections, first BLAS call) before any test
+        await framework.vectorstore.aadd_texts(["warmup"], [{"warmup": True}])
+        await framework.vectorstore.asimilarity_search("warmup", k=1)
+
+        # Opt-in replay of remote model replies; needs the cacheprovider plugin
+        settings = framework.settings
+        use_llm_cache = (
+            pytestconfig.getoption("--llm-cache")
+            and not test_mode
+            and getattr(pytestconfig, "cache", None) is not None
+            and bool(settings.deepseek_api_key or settings.qwen_api_key)
+        )
+        if use_llm_cache:
+            responses = pytestconfig.cache.get(_LLM_CACHE_KEY, {})
+            _install_chat_cache(framework, responses)
+
+        yield framework
+
+        if use_llm_cache:
+            pytestconfig.cache.set(_LLM_CACHE_KEY, responses)
+
+
+@pytest.fixture
+def new_framework(pytestconfig):
+    """Factory for fresh frameworks built like the shared one, for lifecycle tests."""
+    return lambda: _new_framework(pytestconfig)
+
+
+@pytest.fixture
+def framework(shared_framework):
+    """Shared framework whose registered tools are restored after each test."""
+    saved_tools = dict(shared_framework.tools)
+    yield shared_framework
+
+    for name in set(shared_framework.tools) - set(saved_tools):
+        shared_framework.unregister_tool(name)
+    for name, tool in saved_tools.items():
+        if shared_framework.tools.get(name) is not tool:
+            shared_framework.register_tool(tool)
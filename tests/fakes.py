@@ -0,0 +1,117 @@
+"""
+Deterministic in-process fakes used by the unit tests instead of remote models,
+plus the embedding cache the test session wraps around its embeddings.
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import List
+
+from langchain_core.language_models.fake import FakeListLLM
+
+
+class FakeEmbeddings:
+    """Embeddings derived from a hash of the text: stable across runs and free to compute."""
+
+    def __init__(self, dimensions: int = 384):
+        self.dimensions = dimensions
+
+    def embed_query(self, text: str) -> List[float]:
+        # SHAKE-256 is an XOF, so it yields any number of bytes for one vector
+        digest = hashlib.shake_256(text.encode()).digest(self.dimensions)
+        return [byte / 255 for byte in digest]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return self.embed_query(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents(texts)
+
+
+class ToolAwareFakeLLM(FakeListLLM):
+    """FakeListLLM that accepts tools; its canned replies never call them."""
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+def fake_llm() -> FakeListLLM:
+    """LLM that replies with a fixed placeholder response."""
+    return ToolAwareFakeLLM(responses=["This is a placeholder response from FakeListLLM"])
+
+
+class CachedEmbeddings:
+    """LRU cache in front of an embeddings model, keyed by the SHA-256 of each text."""
+
+    def __init__(self, embeddings, maxsize: int = 1024):
+        self.embeddings = embeddings
+        self.maxsize = maxsize
+        self._cache: "OrderedDict[bytes, List[float]]" = OrderedDict()
+
+    def __getattr__(self, name):
+        return getattr(self.embeddings, name)
+
+    @staticmethod
+    def _key(text: str) -> bytes:
+        return hashlib.sha256(text.encode()).digest()
+
+    def _get(self, key: bytes):
+        vector = self._cache.get(key)
+        if vector is not None:
+            self._cache.move_to_end(key)
+        return vector
+
+    def _put(self, key: bytes, vector: List[float]) -> None:
+        self._cache[key] = vector
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    def _split(self, texts: List[str]):
+        """Key every text and split the keys into cached vectors and unique misses."""
+        keys = [self._key(text) for text in texts]
+        hits, misses = {}, {}
+        for key, text in zip(keys, texts):
+            if key in hits or key in misses:
+                continue
+            vector = self._get(key)
+            if vector is None:
+                misses[key] = text
+            else:
+                hits[key] = vector
+        return keys, hits, misses
+
+    def _merge(self, keys, hits, misses, vectors) -> List[List[float]]:
+        """Cache freshly embedded misses and return vectors in input order."""
+        for key, vector in zip(misses, vectors):
+            hits[key] = vector
+            self._put(key, vector)
+        return [hits[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        vector = self._get(key)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self._put(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        vector = self._get(key)
+        if vector is None:
+            vector = await self.embeddings.aembed_query(text)
+            self._put(key, vector)
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, hits, misses = self._split(texts)
+        vectors = self.embeddings.embed_documents(list(misses.values())) if misses else []
+        return self._merge(keys, hits, misses, vectors)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, hits, misses = self._split(texts)
+        vectors = await self.embeddings.aembed_documents(list(misses.values())) if misses else []
+        return self._merge(keys, hits, misses, vectors)
@@ -4,131 +4,511 @@ Basic tests for MCP LangGraph Framework.
 
 import pytest
 import asyncio
+import numpy as np
+from unittest.mock import patch
+from loguru import logger
 from mcp_framework import MCPLangGraphFramework
 from mcp_framework.tools import CalculatorTool, SearchTool, WeatherTool
 from langchain_core.messages import HumanMessage
+from langgraph.graph import StateGraph
+from mcp_framework.core.vector_store import SimpleVectorStore
+from mcp_framework.langchain.graph_builder import GraphBuilder
+from langchain_core.language_models.fake import FakeListLLM
 
+from fakes import CachedEmbeddings, FakeEmbeddings, fake_llm
 
-@pytest.fixture
-def framework():
-    """Create framework for testing."""
-    return MCPLangGraphFramework()
 
+# Tools are stateless, so one instance of each is shared by all tests
+_CALC = CalculatorTool()
+_SEARCH = SearchTool()
+_WEATHER = WeatherTool()
 
-@pytest.mark.asyncio
-async def test_framework_initialization():
-    """Test framework initialization."""
-    async with MCPLangGraphFramework() as framework:
-        # Framework should be properly initialized in context manager
-        assert framework.llm is not None
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_lazy_initialization(new_framework):
+    """Test that components are only created when first requested."""
+    framework = new_framework()
+    try:
+        vectorstore = await framework.get_vectorstore()
+        assert vectorstore is not None
         assert framework.embeddings is not None
-        assert framework.vectorstore is not None
+        assert framework.llm is None
+        assert framework.graph is None
+
+        # Eager initialization reuses the components created so far
+        await framework.initialize()
+        assert framework.vectorstore is vectorstore
+        assert framework.llm is not None
         assert framework.graph is not None
+    finally:
+        await framework.cleanup()
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_component_injection():
+    """Test that components passed to the constructor are used as-is."""
+    llm, embeddings = fake_llm(), FakeEmbeddings()
+    vectorstore = SimpleVectorStore(embeddings)
 
+    async with MCPLangGraphFramework(
+        llm=llm, embeddings=embeddings, vectorstore=vectorstore
+    ) as framework:
+        assert framework.llm is llm
+        assert framework.embeddings is embeddings
+        assert framework.vectorstore is vectorstore
+        assert len(vectorstore) == 0
 
-@pytest.mark.asyncio
-async def test_health_check():
-    """Test health check functionality."""
-    async with MCPLangGraphFramework() as framework:
-        health = await framework.health_check()
-        assert health["framework"] == "healthy"
-        assert "components" in health
-        assert health["components"]["llm"] == "initialized"
-        assert health["components"]["embeddings"] == "initialized"
-        assert health["components"]["vectorstore"] == "initialized"
-        assert health["components"]["graph"] == "initialized"
 
+@pytest.mark.asyncio(loop_scope="session")
+async def test_health_check(framework):
+    """Test framework initialization and health check functionality."""
+    # Accessors return the components created in the context manager
+    assert await framework.get_llm() is framework.llm is not None
+    assert await framework.get_embeddings() is framework.embeddings is not None
+    assert await framework.get_vectorstore() is framework.vectorstore is not None
+    assert await framework.get_graph() is framework.graph is not None
 
-@pytest.mark.asyncio
-async def test_chat_functionality():
+    health = await framework.health_check()
+    assert health == framework.status()
+    assert health["framework"] == "healthy"
+    assert "components" in health
+    assert health["components"]["llm"] == "initialized"
+    assert health["components"]["embeddings"] == "initialized"
+    assert health["components"]["vectorstore"] == "initialized"
+    assert health["components"]["graph"] == "initialized"
+
+    deep_health = await framework.deep_health_check()
+    assert deep_health["framework"] == "healthy"
+    assert deep_health["components"]["llm"] == "healthy"
+    assert deep_health["components"]["embeddings"] == "healthy"
+    assert deep_health["components"]["vectorstore"] == "healthy"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_chat_functionality(framework):
     """Test chat functionality."""
-    async with MCPLangGraphFramework() as framework:
-        response = await framework.chat("Hello, world!")
-        assert isinstance(response, str)
-        assert len(response) > 0
+    response = await framework.chat("Hello, world!")
+    assert isinstance(response, str)
+    assert len(response) > 0
 
 
-@pytest.mark.asyncio
-async def test_embedding_functionality():
-    """Test embedding functionality."""
-    async with MCPLangGraphFramework() as framework:
-        embedding = await framework.embeddings.aembed_query("Test text")
-        assert isinstance(embedding, list)
-        assert len(embedding) > 0  # Should have some dimensions
+@pytest.mark.asyncio(loop_scope="session")
+async def test_embedding_functionality(framework):
+    """Test embedding functionality and storage at each supported precision."""
+    dimensions = (
+        getattr(framework.embeddings, "dimensions", None)
+        or framework.settings.embedding_dimension
+    )
+    embedding = await framework.embeddings.aembed_query("Test text")
+    assert isinstance(embedding, list)
+    assert len(embedding) == dimensions
 
+    # Half-precision storage ranks documents the same way as float32
+    texts = ["Test text", "Other text", "Third text", "Fourth text"]
+    rankings = []
+    for dtype in (np.float32, np.float16):
+        store = SimpleVectorStore(framework.embeddings, dtype=dtype)
+        await store.aadd_texts(texts)
+        results = await store.asimilarity_search("Test text", k=len(texts))
+        rankings.append([doc.page_content for doc in results])
+    assert rankings[0][0] == "Test text"
+    assert rankings[1] == rankings[0]
 
-@pytest.mark.asyncio
-async def test_vector_operations():
-    """Test vector database operations."""
-    async with MCPLangGraphFramework() as framework:
-        doc_ids = await framework.vectorstore.aadd_texts(
-            ["This is a test document", "Another test document"],
-            [{"test": True}, {"test": False}]
+    # Embeddings of another width are rejected
+    store.embeddings = FakeEmbeddings(dimensions=dimensions + 1)
+    with pytest.raises(ValueError):
+        await store.aadd_texts(["Wider text"])
+    with pytest.raises(ValueError):
+        await store.asimilarity_search("Wider query")
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_embedding_cache_hit():
+    """Test that repeated texts are served from the embedding cache."""
+    inner = FakeEmbeddings()
+    cached = CachedEmbeddings(inner)
+    with patch.object(inner, "aembed_query", wraps=inner.aembed_query) as aembed_query, \
+            patch.object(inner, "aembed_documents", wraps=inner.aembed_documents) as aembed_documents:
+        first = await cached.aembed_query("cache hit text")
+        second = await cached.aembed_query("cache hit text")
+        documents = await cached.aembed_documents(
+            ["cache hit text", "cache miss text", "cache miss text"]
         )
-        assert isinstance(doc_ids, list)
-        assert len(doc_ids) == 2
-        
-        results = await framework.vectorstore.asimilarity_search("test document", k=3)
-        assert isinstance(results, list)
-        assert len(results) > 0
+
+    assert aembed_query.call_count == 1
+    assert first == second
+    aembed_documents.assert_called_once_with(["cache miss text"])
+    assert documents[0] == first
+    assert documents[1] == documents[2]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_vector_operations(framework):
+    """Test vector database operations."""
+    # Independent ingests run concurrently
+    ids_a, ids_b = await asyncio.gather(
+        framework.vectorstore.aadd_texts(["This is a test document"], [{"test": True}]),
+        framework.vectorstore.aadd_texts(["Another test document"], [{"test": False}])
+    )
+    assert isinstance(ids_a, list)
+    assert len(ids_a) == 1 and len(ids_b) == 1
+    assert set(ids_a).isdisjoint(ids_b)
+    
+    results = await framework.vectorstore.asimilarity_search("test document", k=3)
+    assert isinstance(results, list)
+    assert len(results) > 0
+
+    filtered = await framework.vectorstore.asimilarity_search(
+        "test document", k=3, filter={"test": True}
+    )
+    assert [doc.page_content for doc in filtered] == ["This is a test document"]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_vector_add_single_embedding_call(framework):
+    """Test that adding several texts issues one batched embedding call."""
+    texts = [f"batched document {i}" for i in range(8)]
+    with patch.object(
+        framework.embeddings, "aembed_documents",
+        wraps=framework.embeddings.aembed_documents
+    ) as aembed_documents, patch.object(
+        framework.embeddings, "aembed_query",
+        wraps=framework.embeddings.aembed_query
+    ) as aembed_query:
+        doc_ids = await framework.vectorstore.aadd_texts(texts)
+
+    assert len(doc_ids) == len(texts)
+    assert aembed_documents.call_count == 1
+    assert aembed_documents.call_args.args[0] == texts
+    assert aembed_query.call_count == 0
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_in_batch_dedup(framework):
+    """Test that duplicate texts in one ingest are embedded only once."""
+    texts = ["dedup x", "dedup y", "dedup x", "dedup x"]
+    with patch.object(
+        framework.embeddings, "aembed_documents",
+        wraps=framework.embeddings.aembed_documents
+    ) as aembed_documents:
+        doc_ids = await framework.vectorstore.aadd_texts(texts, [{"suite": "dedup"}] * 4)
+
+    aembed_documents.assert_called_once_with(["dedup x", "dedup y"])
+    assert len(doc_ids) == len(texts)
+
+    results = await framework.vectorstore.asimilarity_search(
+        "dedup x", k=10, filter={"suite": "dedup"}
+    )
+    assert sorted(doc.page_content for doc in results) == sorted(texts)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_vector_batch_search(framework):
+    """Test that batched search matches individual searches."""
+    await framework.vectorstore.aadd_texts(["alpha", "beta", "gamma"])
+    queries = ["alpha", "gamma"]
+
+    batch_results = await framework.vectorstore.asimilarity_search_batch(queries, k=2)
+
+    assert len(batch_results) == len(queries)
+    for query, results in zip(queries, batch_results):
+        single = await framework.vectorstore.asimilarity_search(query, k=2)
+        assert [doc.page_content for doc in results] == [doc.page_content for doc in single]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_vector_delete(framework):
+    """Test deleting documents from the vector store."""
+    doc_ids = await framework.vectorstore.aadd_texts(
+        ["first document", "second document", "third document"],
+        [{"suite": "delete"}] * 3
+    )
+
+    assert await framework.vectorstore.adelete([doc_ids[0]]) is True
+
+    results = await framework.vectorstore.asimilarity_search(
+        "document", k=10, filter={"suite": "delete"}
+    )
+    contents = [doc.page_content for doc in results]
+    assert "first document" not in contents
+    assert "second document" in contents
+    assert "third document" in contents
+
+
+def test_vector_add_metadata_mismatch():
+    """Test that a metadata list of the wrong length is rejected before adding."""
+    store = SimpleVectorStore(FakeEmbeddings())
+    store.add_texts(["kept"], [{"t": 1}])
+
+    with pytest.raises(ValueError):
+        store.add_texts(["a", "b"], [{"t": 1}])
+
+    assert len(store) == 1
+    assert [doc.page_content for doc in store.similarity_search("a", filter={"t": 1})] == ["kept"]
+
+
+def test_vector_dimension_mismatch():
+    """Test that embeddings of a different width are rejected with a clear error."""
+    store = SimpleVectorStore(FakeEmbeddings(dimensions=8))
+    store.add_texts(["kept"])
+
+    store.embeddings = FakeEmbeddings(dimensions=16)
+    with pytest.raises(ValueError, match="dimension 16"):
+        store.add_texts(["wider"])
+    with pytest.raises(ValueError, match="dimension 16"):
+        store.similarity_search("wider query")
+    with pytest.raises(ValueError, match="dimension 16"):
+        store.similarity_search_batch(["wider batch query"])
+
+    assert len(store) == 1
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_vector_search_concurrent_delete():
+    """Test that deletes during a search's embedding await do not corrupt results."""
+    class YieldingEmbeddings(FakeEmbeddings):
+        async def aembed_query(self, text):
+            await asyncio.sleep(0)
+            return self.embed_query(text)
+
+    store = SimpleVectorStore(YieldingEmbeddings())
+    doc_ids = await store.aadd_texts(
+        ["one a", "zero a", "zero b", "one b"],
+        [{"t": 1}, {"t": 0}, {"t": 0}, {"t": 1}]
+    )
+
+    search = asyncio.ensure_future(store.asimilarity_search("one", k=4, filter={"t": 1}))
+    await asyncio.sleep(0)
+    store.delete(doc_ids[:2])
+    results = await search
+
+    assert [(doc.page_content, doc.metadata) for doc in results] == [("one b", {"t": 1})]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_vector_filter_with_missing_metadata():
+    """Test that documents added with None metadata are skipped by filters."""
+    store = SimpleVectorStore(FakeEmbeddings())
+    await store.aadd_texts(["no metadata", "tagged"], [None, {"x": 1}])
+
+    results = await store.asimilarity_search("tagged", k=2, filter={"x": 1})
+    assert [doc.page_content for doc in results] == ["tagged"]
+
+
+def test_vector_query_cache_cleared_on_model_swap():
+    """Test that swapping the embeddings model drops query vectors from the old one."""
+    store = SimpleVectorStore(FakeEmbeddings(dimensions=8))
+    store.add_texts(["doc"])
+    store.similarity_search("query")
+
+    store.embeddings = FakeEmbeddings(dimensions=8)
+    with patch.object(store.embeddings, "embed_query", wraps=store.embeddings.embed_query) as embed_query:
+        store.similarity_search("query")
+
+    assert embed_query.call_count == 1
 
 
-@pytest.mark.asyncio
-async def test_tool_management():
+@pytest.mark.asyncio(loop_scope="session")
+async def test_vector_search_query_cache(framework):
+    """Test that repeated searches reuse the cached query embedding."""
+    with patch.object(
+        framework.embeddings, "aembed_query",
+        wraps=framework.embeddings.aembed_query
+    ) as aembed_query:
+        first = await framework.vectorstore.asimilarity_search("cached query", k=1)
+        second = await framework.vectorstore.asimilarity_search("cached query", k=1)
+
+    assert aembed_query.call_count == 1
+    assert [doc.page_content for doc in first] == [doc.page_content for doc in second]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_tool_management(framework):
     """Test tool management functionality."""
-    async with MCPLangGraphFramework() as framework:
-        # Initially no tools
-        tools = framework.get_available_tools()
-        assert isinstance(tools, list)
-        assert len(tools) == 0
-        
-        # Register a tool
-        calc_tool = CalculatorTool()
-        framework.register_tool(calc_tool)
-        
-        # Should have one tool now
-        tools = framework.get_available_tools()
-        assert len(tools) == 1
-        assert "calculator" in tools
-
-
-@pytest.mark.asyncio
-async def test_workflow_execution():
+    # Initially no tools
+    tools = framework.get_available_tools()
+    assert isinstance(tools, list)
+    assert tools == []
+    
+    # Register a tool
+    framework.register_tool(_CALC)
+    
+    # Should have one tool now
+    assert framework.get_available_tools() == ["calculator"]
+    assert framework.tools["calculator"] is _CALC
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_workflow_execution(framework):
     """Test workflow execution."""
-    async with MCPLangGraphFramework() as framework:
-        # Register calculator tool
-        framework.register_tool(CalculatorTool())
-        
-        # Run workflow with calculation
-        result = await framework.run_workflow({
-            "messages": [HumanMessage(content="Calculate 2 + 3")]
-        })
-        
+    # Register calculator tool
+    framework.register_tool(_CALC)
+    
+    # Run workflow with calculation
+    result = await framework.run_workflow({
+        "messages": [HumanMessage(content="Calculate 2 + 3")]
+    })
+    
+    assert "messages" in result
+    assert len(result["messages"]) > 0
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_tool_changes_rebuild_graph(framework):
+    """Test that tools registered after initialization reach the workflow graph."""
+    framework.register_tool(_CALC)
+    await framework.run_workflow({"messages": [HumanMessage(content="Calculate 2 + 3")]})
+
+    assert "tools" in framework.graph.nodes
+    assert framework.graph_builder.tools_by_name == {"calculator": _CALC}
+
+    framework.unregister_tool("calculator")
+    await framework.run_workflow({"messages": [HumanMessage(content="Hello")]})
+
+    assert "tools" not in framework.graph.nodes
+    assert framework.graph_builder.tools == []
+
+
+def test_graph_requires_tool_capable_llm():
+    """Test that tools with an LLM that cannot bind them fail loudly."""
+    llm = FakeListLLM(responses=["plain text"])
+
+    with pytest.raises(RuntimeError, match="calculator"):
+        GraphBuilder(llm=llm, tools=[_CALC])
+
+    # Tool-free graphs do not need tool support
+    assert "tools" not in GraphBuilder(llm=llm, tools=[]).build_default_graph().nodes
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_workflow_caching(framework):
+    """Test that the compiled workflow is reused until the tool set changes."""
+    framework.register_tool(_CALC)
+
+    with patch.object(
+        StateGraph, "compile", autospec=True, side_effect=StateGraph.compile
+    ) as compile_graph:
+        for _ in range(3):
+            result = await framework.run_workflow({
+                "messages": [HumanMessage(content="Calculate 2 + 3")]
+            })
+            assert "messages" in result
+
+    assert compile_graph.call_count == 1
+    # The single recompile picked up the newly registered tool
+    assert "tools" in framework.graph.nodes
+    assert "tools" in framework._app.get_graph().nodes
+
+
+@pytest.mark.parametrize("prompts", [
+    ["Calculate 2 + 3"],
+    ["Calculate 2 + 3", "Calculate 4 + 5", "Calculate 6 + 7"],
+])
+@pytest.mark.asyncio(loop_scope="session")
+async def test_workflow_batch(framework, prompts):
+    """Test running several workflows through one batched graph call."""
+    results = await framework.run_workflow_batch([
+        {"messages": [HumanMessage(content=prompt)]} for prompt in prompts
+    ])
+
+    assert len(results) == len(prompts)
+    for prompt, result in zip(prompts, results):
+        assert "messages" in result
+        assert result["messages"][0].content == prompt
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_workflow_batch_releases_threads(framework):
+    """Test that batched runs only keep the threads callers asked for."""
+    threads_before = set(framework.memory.storage)
+
+    for _ in range(3):
+        await framework.run_workflow_batch(
+            [{"messages": [HumanMessage(content=f"Batch {i}")]} for i in range(3)]
+        )
+    assert set(framework.memory.storage) == threads_before
+
+    await framework.run_workflow_batch(
+        [{"messages": [HumanMessage(content="Kept")]}, {"messages": [HumanMessage(content="Dropped")]}],
+        configs=[{"configurable": {"thread_id": "batch_kept"}}, None]
+    )
+    assert set(framework.memory.storage) == threads_before | {"batch_kept"}
+    framework.memory.delete_thread("batch_kept")
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_workflow_batch_shared_config(framework):
+    """Test that a reused config dict still gives each batched input its own thread."""
+    prompts = ["Shared config 1", "Shared config 2", "Shared config 3"]
+    config = {"configurable": {}}
+
+    results = await framework.run_workflow_batch(
+        [{"messages": [HumanMessage(content=prompt)]} for prompt in prompts],
+        configs=[config] * len(prompts)
+    )
+
+    assert config == {"configurable": {}}
+    for prompt, result in zip(prompts, results):
+        assert [m.content for m in result["messages"][:1]] == [prompt]
+        assert len(result["messages"]) == 2
+
+    with pytest.raises(ValueError):
+        await framework.run_workflow_batch(
+            [{"messages": [HumanMessage(content="x")]}], configs=[config, config]
+        )
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_parallel_workflow(framework):
+    """Test that concurrent workflow runs on separate threads all complete."""
+    results = await asyncio.gather(*(
+        framework.run_workflow(
+            {"messages": [HumanMessage(content=f"Parallel request {i}")]},
+            config={"configurable": {"thread_id": f"parallel_{i}"}}
+        )
+        for i in range(3)
+    ))
+
+    for i, result in enumerate(results):
         assert "messages" in result
-        assert len(result["messages"]) > 0
+        assert result["messages"][0].content == f"Parallel request {i}"
 
 
-@pytest.mark.asyncio
-async def test_multiple_tools():
+@pytest.mark.asyncio(loop_scope="session")
+async def test_multiple_tools(framework):
     """Test multiple tool registration and usage."""
-    async with MCPLangGraphFramework() as framework:
-        # Register multiple tools
-        framework.register_tool(CalculatorTool())
-        framework.register_tool(SearchTool())
-        framework.register_tool(WeatherTool())
-        
-        # Check all tools are registered
-        tools = framework.get_available_tools()
-        assert len(tools) == 3
-        assert "calculator" in tools
-        assert "search" in tools
-        assert "weather" in tools
-
-
-@pytest.mark.asyncio
-async def test_context_manager():
+    # Register multiple tools
+    framework.register_tool(_CALC)
+    framework.register_tool(_SEARCH)
+    framework.register_tool(_WEATHER)
+    
+    # Check all tools are registered, each exactly once
+    tools = framework.get_available_tools()
+    assert len(tools) == 3
+    assert set(tools) == {"calculator", "search", "weather"}
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_duplicate_tool_registration(framework):
+    """Test that re-registering a tool name warns and replaces the old tool."""
+    first, second = CalculatorTool(), CalculatorTool()
+    warnings = []
+    handler_id = logger.add(warnings.append, level="WARNING", format="{message}")
+    try:
+        framework.register_tool(first)
+        framework.register_tool(second)
+    finally:
+        logger.remove(handler_id)
+
+    assert framework.get_available_tools().count("calculator") == 1
+    assert framework.tools["calculator"] is second
+    assert any("calculator is already registered" in str(w) for w in warnings)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_context_manager(new_framework):
     """Test that framework works properly as context manager."""
-    framework = MCPLangGraphFramework()
+    framework = new_framework()
     
     # Should not be initialized yet
     assert framework.llm is None
@@ -144,33 +524,27 @@ async def test_context_manager():
     # Note: We don't test cleanup state as it depends on implementation
 
 
-@pytest.mark.asyncio
-async def test_tool_unregistration():
+@pytest.mark.asyncio(loop_scope="session")
+async def test_tool_unregistration(framework):
     """Test tool unregistration functionality."""
-    async with MCPLangGraphFramework() as framework:
-        # Register a tool
-        calc_tool = CalculatorTool()
-        framework.register_tool(calc_tool)
-        
-        # Verify it's registered
-        tools = framework.get_available_tools()
-        assert "calculator" in tools
-        
-        # Unregister the tool
-        framework.unregister_tool("calculator")
-        
-        # Verify it's removed
-        tools = framework.get_available_tools()
-        assert "calculator" not in tools
-        assert len(tools) == 0
-
-
-@pytest.mark.asyncio
-async def test_health_check_uninitialized():
-    """Test health check on uninitialized framework."""
+    # Register a tool
+    framework.register_tool(_CALC)
+    
+    # Verify it's registered
+    assert set(framework.get_available_tools()) == {"calculator"}
+    
+    # Unregister the tool
+    framework.unregister_tool("calculator")
+    
+    # Verify it's removed
+    assert framework.get_available_tools() == []
+
+
+def test_health_check_uninitialized():
+    """Test the status snapshot of an uninitialized framework."""
     framework = MCPLangGraphFramework()
     
-    health = await framework.health_check()
+    health = framework.status()
     assert health["framework"] == "not_initialized"
     assert health["components"]["llm"] == "not_initialized"
     assert health["components"]["embeddings"] == "not_initialized"